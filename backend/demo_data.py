@@ -3,9 +3,10 @@ Demo data generator for testing the Smart Job Application Tracker
 This provides sample job-related emails when Gmail API is not available
 """
 
-import random
+import numpy as np
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # Sample companies
 COMPANIES = [
@@ -89,88 +90,10 @@ EMAIL_SNIPPETS = {
     ]
 }
 
-def generate_demo_emails(count: int = 50) -> List[Dict[str, Any]]:
-    """Generate demo email data for testing."""
-    emails = []
-    
-    for i in range(count):
-        # Randomly select category with weighted distribution
-        category = random.choices(
-            ["applications_sent", "rejected", "interview_scheduled", "offer_received"],
-            weights=[0.4, 0.3, 0.2, 0.1]
-        )[0]
-        
-        company = random.choice(COMPANIES)
-        job_title = random.choice(JOB_TITLES)
-        
-        # Generate random date within last 6 months
-        days_ago = random.randint(0, 180)
-        date = datetime.now() - timedelta(days=days_ago)
-        
-        # Generate email ID
-        email_id = f"demo_email_{i:04d}"
-        
-        # Select random subject and snippet
-        subject_template = random.choice(EMAIL_SUBJECTS[category])
-        snippet_template = random.choice(EMAIL_SNIPPETS[category])
-        
-        subject = subject_template.format(company=company, job_title=job_title)
-        snippet = snippet_template.format(company=company, job_title=job_title)
-        
-        # Generate from email
-        from_email = f"careers@{company.lower().replace(' ', '')}.com"
-        
-        # Create Gmail URL (demo)
-        gmail_url = f"https://mail.google.com/mail/u/0/#inbox/{email_id}"
-        
-        email_data = {
-            'id': email_id,
-            'subject': subject,
-            'snippet': snippet,
-            'from_email': from_email,
-            'date': date.isoformat(),
-            'category': category,
-            'company': company,
-            'gmail_url': gmail_url
-        }
-        
-        emails.append(email_data)
-    
-    # Sort by date (newest first)
-    emails.sort(key=lambda x: x['date'], reverse=True)
-    
-    return emails
-
-def generate_demo_stats(emails: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Generate demo statistics from email data."""
-    categories = {}
-    for email in emails:
-        category = email['category']
-        categories[category] = categories.get(category, 0) + 1
-    
-    return {
-        'total_applications': len(emails),
-        'applications_sent': categories.get('applications_sent', 0),
-        'rejected': categories.get('rejected', 0),
-        'interview_scheduled': categories.get('interview_scheduled', 0),
-        'offer_received': categories.get('offer_received', 0),
-        'categories': categories
-    }
-
-def generate_demo_email_detail(email_id: str, emails: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Generate detailed email content for a specific email."""
-    email = next((e for e in emails if e['id'] == email_id), None)
-    
-    if not email:
-        return None
-    
-    # Generate a more detailed body
-    company = email['company']
-    job_title = email['job_title'] if 'job_title' in email else "Software Engineer"
-    category = email['category']
-    
-    body_templates = {
-        "applications_sent": f"""Dear Applicant,
+# Detailed email bodies, defined once at module scope and filled in with
+# .format() on demand instead of rebuilding ~4 KB of f-strings per call
+BODY_TEMPLATES = {
+    "applications_sent": """Dear Applicant,
 
 Thank you for your interest in the {job_title} position at {company}. We have successfully received your application and it has been added to our review queue.
 
@@ -180,8 +103,8 @@ In the meantime, if you have any questions about your application, please don't
 
 Best regards,
 The {company} Hiring Team""",
-        
-        "rejected": f"""Dear Applicant,
+
+    "rejected": """Dear Applicant,
 
 Thank you for your interest in the {job_title} position at {company} and for taking the time to apply. We appreciate the effort you put into your application.
 
@@ -193,8 +116,8 @@ We wish you the best in your job search and future career endeavors.
 
 Best regards,
 The {company} Hiring Team""",
-        
-        "interview_scheduled": f"""Dear Applicant,
+
+    "interview_scheduled": """Dear Applicant,
 
 We are excited to move forward with your application for the {job_title} position at {company}! We were impressed by your background and would like to schedule an interview to learn more about your experience and discuss the role in detail.
 
@@ -210,8 +133,8 @@ We look forward to meeting you!
 
 Best regards,
 The {company} Hiring Team""",
-        
-        "offer_received": f"""Dear Applicant,
+
+    "offer_received": """Dear Applicant,
 
 Congratulations! We are thrilled to offer you the {job_title} position at {company}. After a thorough interview process, we are confident that your skills, experience, and values align perfectly with our team and company mission.
 
@@ -227,10 +150,114 @@ We're excited to welcome you to {company}!
 
 Best regards,
 The {company} Hiring Team"""
+}
+
+CATEGORIES = ["applications_sent", "rejected", "interview_scheduled", "offer_received"]
+CATEGORY_WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+
+def generate_demo_emails(count: int = 50) -> List[Dict[str, Any]]:
+    """Generate demo email data for testing."""
+    rng = np.random.default_rng()
+
+    # Sample everything up front in vectorized calls instead of making
+    # N scalar random.choice/randint calls inside the loop
+    categories = rng.choice(CATEGORIES, size=count, p=CATEGORY_WEIGHTS).tolist()
+    companies = rng.choice(COMPANIES, size=count).tolist()
+    job_titles = rng.choice(JOB_TITLES, size=count).tolist()
+    # Pre-sort the integer day offsets (newest first) so the emails come
+    # out already ordered and no ISO-string sort is needed at the end
+    days_ago = np.sort(rng.integers(0, 181, size=count)).tolist()
+    # Independent draws, like the baseline's separate random.choice calls —
+    # reusing one pick for both lists would limit the subject/snippet
+    # pairings to lcm(len(subjects), len(snippets)) combinations
+    subject_picks = rng.integers(0, 1 << 30, size=count).tolist()
+    snippet_picks = rng.integers(0, 1 << 30, size=count).tolist()
+
+    now = datetime.now()
+    emails = []
+
+    for i in range(count):
+        category = categories[i]
+        company = companies[i]
+        job_title = job_titles[i]
+
+        # Generate random date within last 6 months
+        date = now - timedelta(days=days_ago[i])
+
+        # Generate email ID
+        email_id = f"demo_email_{i:04d}"
+
+        # Select random subject and snippet
+        subjects = EMAIL_SUBJECTS[category]
+        snippets = EMAIL_SNIPPETS[category]
+        subject = subjects[subject_picks[i] % len(subjects)].format(company=company, job_title=job_title)
+        snippet = snippets[snippet_picks[i] % len(snippets)].format(company=company, job_title=job_title)
+
+        # Generate from email
+        from_email = f"careers@{company.lower().replace(' ', '')}.com"
+
+        # Create Gmail URL (demo)
+        gmail_url = f"https://mail.google.com/mail/u/0/#inbox/{email_id}"
+
+        email_data = {
+            'id': email_id,
+            'subject': subject,
+            'snippet': snippet,
+            'from_email': from_email,
+            'date': date.isoformat(),
+            'category': category,
+            'company': company,
+            'gmail_url': gmail_url
+        }
+
+        emails.append(email_data)
+
+    return emails
+
+def generate_demo_stats(emails: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Generate demo statistics from email data."""
+    categories = Counter(email['category'] for email in emails)
+
+    return {
+        'total_applications': len(emails),
+        'applications_sent': categories.get('applications_sent', 0),
+        'rejected': categories.get('rejected', 0),
+        'interview_scheduled': categories.get('interview_scheduled', 0),
+        'offer_received': categories.get('offer_received', 0),
+        'categories': dict(categories)
     }
+
+# Cached id -> email index for the most recent email list, so repeated
+# detail lookups are O(1) instead of a linear scan per call. The cache
+# holds a strong reference to the indexed list and compares with `is`:
+# a bare id(emails) key is unsafe because CPython reuses object ids once
+# a list is garbage-collected.
+_email_index_src: Optional[List[Dict[str, Any]]] = None
+_email_index: Dict[str, Dict[str, Any]] = {}
+
+def _index_emails(emails: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    global _email_index_src, _email_index
+    if _email_index_src is not emails:
+        _email_index = {e['id']: e for e in emails}
+        _email_index_src = emails
+    return _email_index
+
+def generate_demo_email_detail(email_id: str, emails: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Generate detailed email content for a specific email."""
+    email = _index_emails(emails).get(email_id)
+
+    if not email:
+        return None
     
-    body = body_templates.get(category, "Email content not available.")
-    
+    # Generate a more detailed body
+    company = email['company']
+    job_title = email['job_title'] if 'job_title' in email else "Software Engineer"
+    category = email['category']
+
+    body = BODY_TEMPLATES.get(category, "Email content not available.").format(
+        company=company, job_title=job_title
+    )
+
     return {
         'id': email['id'],
         'subject': email['subject'],
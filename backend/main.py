@@ -1,45 +1,73 @@
 from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse, ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request as GoogleAuthRequest
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 import os
-import json
+import time
+import queue
+import asyncio
+import threading
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import httpx
+import orjson
 import base64
 import re
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import secrets
+from cachetools import TTLCache
+from collections import Counter
+from functools import lru_cache
 from supabase import create_client, Client
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 # Load environment variables
 load_dotenv()
 
+# Logging: handlers run on a background thread via a queue, so request
+# handlers never block on a synchronous stdout write. Level comes from
+# LOG_LEVEL (debug lines then cost only a level check in production).
+_log_queue = queue.Queue(-1)
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(
+    logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+)
+_log_listener = QueueListener(_log_queue, _log_stream_handler)
+_log_listener.start()
+
+logger = logging.getLogger(__name__)
+logger.addHandler(QueueHandler(_log_queue))
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger.propagate = False
+
 # In-memory storage fallback (for development/testing)
 user_tokens = {}
 
 app = FastAPI(
     title="Smart Job Application Tracker",
     description="A FastAPI backend for tracking job applications via Gmail integration",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse  # orjson encodes large email lists much faster than stdlib json
 )
 
 # CORS middleware
+# Starlette doesn't expand "*" inside allow_origins entries, so the old
+# wildcard strings never matched; a precompiled regex covers the Vercel
+# and Render deployments instead
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
         os.getenv("FRONTEND_URL", "http://localhost:5173"),
-        "https://*.vercel.app",  # Allow all Vercel deployments
-        "https://*.onrender.com",  # Allow Render deployments
-        "https://job-tracker-frontend-tau.vercel.app",  # Your specific Vercel domain
     ],
+    allow_origin_regex=r"^https://[\w-]+(\.[\w-]+)*\.(vercel\.app|onrender\.com)$",
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -74,14 +102,6 @@ class EmailDetail(BaseModel):
     company: Optional[str] = None
     gmail_url: str
 
-class DashboardStats(BaseModel):
-    total_applications: int
-    applications_sent: int
-    rejected: int
-    interview_scheduled: int
-    offer_received: int
-    categories: Dict[str, int]
-
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
@@ -106,144 +126,460 @@ CATEGORY_KEYWORDS = {
     ]
 }
 
+# Precompiled at import time: one alternation pattern with a named group
+# per category, so a single regex pass both finds a keyword and tells us
+# which category it belongs to via match.lastgroup.
+CATEGORY_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{category}>" + "|".join(re.escape(keyword) for keyword in keywords) + ")"
+        for category, keywords in CATEGORY_KEYWORDS.items()
+    ),
+    re.IGNORECASE
+)
+
 def categorize_email(subject: str, snippet: str) -> str:
     """Categorize email based on subject and snippet content."""
-    content = f"{subject} {snippet}".lower()
-    
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword.lower() in content:
-                return category
-    
+    match = CATEGORY_PATTERN.search(f"{subject} {snippet}")
+    if match:
+        return match.lastgroup
     return "applications_sent"  # Default category
 
+# Byte-encoded keyword tables for callers that already hold raw bytes
+# (e.g. a base64-decoded body); bytes.find runs the C memmem scan without
+# first decoding the buffer to str. The regex stays the default for text.
+CATEGORY_KEYWORDS_B = {
+    category: [keyword.lower().encode() for keyword in keywords]
+    for category, keywords in CATEGORY_KEYWORDS.items()
+}
+
+def categorize_email_bytes(buf: bytes) -> str:
+    """Categorize a raw bytes buffer (keywords are ASCII, so bytes.lower suffices).
+
+    Ties are resolved by the earliest keyword occurrence in the buffer, so
+    this agrees with the leftmost-match semantics of CATEGORY_PATTERN.
+    """
+    buf = buf.lower()
+    best_offset = -1
+    best_category = None
+    for category, keywords in CATEGORY_KEYWORDS_B.items():
+        for keyword in keywords:
+            offset = buf.find(keyword)
+            if offset != -1 and (best_offset == -1 or offset < best_offset):
+                best_offset = offset
+                best_category = category
+    return best_category or "applications_sent"
+
+# Personal email providers that never identify an employer; frozenset for
+# O(1) membership instead of a list scan per email
+PERSONAL_EMAIL_DOMAINS = frozenset({
+    'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com',
+    'icloud.com', 'aol.com', 'protonmail.com', 'live.com'
+})
+
+# Pulls the address out of a From header in one pass, including the
+# "Display Name <user@domain>" form
+_ADDR_RE = re.compile(r'<?([^@<>\s]+)@([^>\s]+)>?')
+
 def extract_company_name(from_email: str, subject: str) -> Optional[str]:
     """Extract company name from email address or subject."""
     # Try to extract from email domain
-    if '@' in from_email:
-        domain = from_email.split('@')[1]
+    match = _ADDR_RE.search(from_email)
+    if match:
+        domain = match.group(2).lower()
         # Remove common email providers
-        if domain not in ['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com']:
-            return domain.split('.')[0].title()
-    
+        if domain not in PERSONAL_EMAIL_DOMAINS:
+            return domain.partition('.')[0].title()
+
     # Try to extract from subject line
     # Look for common patterns like "Company Name - Job Title"
-    subject_parts = subject.split(' - ')
-    if len(subject_parts) > 1:
-        return subject_parts[0].strip()
-    
+    company, separator, _ = subject.partition(' - ')
+    if separator:
+        return company.strip()
+
     return None
 
-def get_gmail_service(credentials_dict: Dict[str, Any]):
-    """Build Gmail service from credentials."""
+# Built Gmail services keyed by user_id; rebuilding one per request meant
+# re-parsing the discovery document and constructing a fresh http client.
+# Bounded like the other caches, and invalidated by save_user_token_db so
+# a re-authentication doesn't keep serving the old credentials.
+# TTLCache is not thread-safe, and these caches are now touched both from
+# the event loop and from asyncio.to_thread workers, so every get/set/pop
+# holds the cache's lock (expiry mutates internal bookkeeping even on reads).
+_service_cache = TTLCache(maxsize=1_000, ttl=3600)
+_service_cache_lock = threading.Lock()
+
+def get_gmail_service(credentials_dict: Dict[str, Any], user_id: Optional[str] = None):
+    """Build (or reuse) a Gmail service from credentials."""
     try:
-        # Debug: Print what we're trying to use
-        print(f"Building Gmail service with credentials: {list(credentials_dict.keys())}")
-        print(f"Has refresh_token: {credentials_dict.get('refresh_token') is not None}")
-        print(f"Has token: {credentials_dict.get('token') is not None}")
-        
+        if user_id:
+            with _service_cache_lock:
+                cached = _service_cache.get(user_id)
+        else:
+            cached = None
+        if cached is not None:
+            credentials, service = cached
+            if not credentials.expired:
+                return service
+
         # If refresh_token is None, we need to handle this case
         if credentials_dict.get('refresh_token') is None:
-            print("Warning: No refresh token available. This might cause issues with token refresh.")
+            logger.warning("No refresh token available. This might cause issues with token refresh.")
             # For now, we'll still try to use the access token
             # In a production app, you'd want to handle this differently
-        
+
         credentials = Credentials.from_authorized_user_info(credentials_dict)
-        service = build('gmail', 'v1', credentials=credentials)
+        if credentials.expired and credentials.refresh_token:
+            credentials.refresh(GoogleAuthRequest())
+
+        # static_discovery uses the discovery document bundled with the
+        # client library instead of fetching it over HTTPS on first build
+        service = build('gmail', 'v1', credentials=credentials,
+                        cache_discovery=False, static_discovery=True)
+        if user_id:
+            with _service_cache_lock:
+                _service_cache[user_id] = (credentials, service)
         return service
     except Exception as e:
-        print(f"Error building Gmail service: {str(e)}")
+        logger.error(f"Error building Gmail service: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to build Gmail service: {str(e)}")
 
-def get_user_emails(service, max_results: int = 50) -> List[Dict[str, Any]]:
-    """Fetch emails from Gmail API."""
+# Broad search query to find potential job-related emails
+JOB_EMAIL_QUERY = "subject:(application OR interview OR offer OR rejection OR job OR position OR hiring OR career OR resume OR cv) OR from:(noreply OR careers OR jobs OR hiring OR recruit OR talent OR hr OR human.resources)"
+
+# Local mirror of JOB_EMAIL_QUERY for paths where Gmail's q= filter is not
+# available (the history sync): the same subject terms and sender tokens,
+# word-bounded the way Gmail tokenizes them
+_JOB_SUBJECT_RE = re.compile(
+    r'\b(?:application|interview|offer|rejection|job|position|hiring|career|resume|cv)\b',
+    re.IGNORECASE
+)
+_JOB_FROM_RE = re.compile(
+    r'\b(?:noreply|careers|jobs|hiring|recruit|talent|hr|human\.resources)\b',
+    re.IGNORECASE
+)
+
+def is_job_related(subject: str, from_email: str) -> bool:
+    """Approximate JOB_EMAIL_QUERY locally for messages not found via search."""
+    return bool(_JOB_SUBJECT_RE.search(subject) or _JOB_FROM_RE.search(from_email))
+
+# Narrower Gmail queries used when the client filters to one category, so
+# Gmail only returns messages likely to land in that bucket instead of the
+# whole job-related set being fetched and filtered in Python
+CATEGORY_QUERIES = {
+    "applications_sent": 'subject:("application submitted" OR "application received" OR "thank you for applying" OR "application confirmation" OR "application status")',
+    "rejected": 'subject:(unfortunately OR "regret to inform" OR "not moving forward" OR "not selected" OR "position filled" OR rejection)',
+    "interview_scheduled": 'subject:(interview OR schedule OR "next steps" OR "interview invitation" OR "interview request")',
+    "offer_received": 'subject:(offer OR congratulations OR "job offer" OR "offer letter")',
+}
+
+# Calls per batch request, tunable via env; Gmail caps batches at 100
+GMAIL_BATCH_SIZE = min(int(os.getenv("GMAIL_BATCH_SIZE", 100)), 100)
+
+# Direct REST access for the async fetch path
+GMAIL_API_BASE = "https://gmail.googleapis.com/gmail/v1"
+
+# Bound concurrent Gmail requests so we don't trip rate limits
+_gmail_fetch_semaphore = asyncio.Semaphore(10)
+_gmail_http: Optional[httpx.AsyncClient] = None
+
+def get_gmail_http() -> httpx.AsyncClient:
+    """Return the shared async HTTP client for the Gmail REST API."""
+    global _gmail_http
+    if _gmail_http is None:
+        _gmail_http = httpx.AsyncClient(base_url=GMAIL_API_BASE, timeout=30.0)
+    return _gmail_http
+
+def refresh_access_token(token_data: Dict[str, Any], user_id: Optional[str] = None) -> str:
+    """Refresh an expired Gmail access token and persist the new one."""
+    credentials = Credentials.from_authorized_user_info(token_data)
+    credentials.refresh(GoogleAuthRequest())
+    token_data['token'] = credentials.token
+    if user_id:
+        save_user_token_db(user_id, token_data)
+    return credentials.token
+
+async def list_message_ids_async(access_token: str, query: str, max_results: int) -> List[str]:
+    """List up to max_results matching message IDs via the Gmail REST API.
+
+    Gmail caps maxResults at 500 per page, so larger requests follow
+    nextPageToken until max_results IDs are collected or the results run out.
+    """
+    message_ids: List[str] = []
+    page_token = None
+    while len(message_ids) < max_results:
+        params = {
+            'q': query,
+            'maxResults': min(max_results - len(message_ids), 500),
+            'fields': 'messages/id,nextPageToken'
+        }
+        if page_token:
+            params['pageToken'] = page_token
+        response = await get_gmail_http().get(
+            "/users/me/messages",
+            params=params,
+            headers={'Authorization': f"Bearer {access_token}"}
+        )
+        response.raise_for_status()
+        data = response.json()
+        message_ids.extend(m['id'] for m in data.get('messages', []))
+        page_token = data.get('nextPageToken')
+        if not page_token:
+            break
+    return message_ids[:max_results]
+
+async def _fetch_message_metadata_async(access_token: str, message_id: str) -> Dict[str, Any]:
+    async with _gmail_fetch_semaphore:
+        response = await get_gmail_http().get(
+            f"/users/me/messages/{message_id}",
+            params=[
+                ('format', 'metadata'),
+                ('metadataHeaders', 'Subject'),
+                ('metadataHeaders', 'From'),
+                ('metadataHeaders', 'Date'),
+                ('fields', 'id,snippet,payload/headers')
+            ],
+            headers={'Authorization': f"Bearer {access_token}"}
+        )
+        response.raise_for_status()
+        return response.json()
+
+async def fetch_message_full_async(access_token: str, message_id: str) -> Dict[str, Any]:
+    """Fetch a single full message (headers + body) via the Gmail REST API."""
+    response = await get_gmail_http().get(
+        f"/users/me/messages/{message_id}",
+        # The detail view only reads headers and body parts, so skip
+        # labelIds, sizeEstimate, historyId and friends
+        params={'format': 'full', 'fields': 'id,payload'},
+        headers={'Authorization': f"Bearer {access_token}"}
+    )
+    response.raise_for_status()
+    return response.json()
+
+async def fetch_messages_metadata_async(access_token: str, message_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch message metadata concurrently instead of one request at a time.
+
+    Async counterpart of fetch_messages_metadata: all gets run under
+    asyncio.gather with bounded concurrency, so N messages cost roughly
+    ceil(N / concurrency) round-trips of latency rather than N.
+    """
+    results = await asyncio.gather(
+        *[_fetch_message_metadata_async(access_token, mid) for mid in message_ids],
+        return_exceptions=True
+    )
+    fetched = {}
+    for mid, result in zip(message_ids, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Error fetching message {mid}: {result}")
+        else:
+            fetched[mid] = result
+    return fetched
+
+async def get_user_emails_async(token_data: Dict[str, Any], max_results: int = 50,
+                                user_id: Optional[str] = None,
+                                category: Optional[str] = None,
+                                company: Optional[str] = None,
+                                since: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Fetch emails via the Gmail REST API, using the Supabase cache for known messages."""
+    access_token = token_data.get('token')
+    # Filter server-side when we have a query for the requested category;
+    # company and date predicates are pushed down the same way so Gmail
+    # doesn't return messages we'd immediately discard
+    query = CATEGORY_QUERIES.get(category, JOB_EMAIL_QUERY)
+    if company:
+        company_term = company.strip().replace('"', '')
+        if company_term:
+            query = f'({query}) (from:{company_term} OR subject:"{company_term}")'
+    if since:
+        query = f"({query}) after:{since}"
     try:
-        # Broader search query to find more potential job-related emails
-        query = "subject:(application OR interview OR offer OR rejection OR job OR position OR hiring OR career OR resume OR cv) OR from:(noreply OR careers OR jobs OR hiring OR recruit OR talent OR hr OR human.resources)"
-        results = service.users().messages().list(
-            userId='me',
-            q=query,
-            maxResults=min(max_results, 50)  # Limit to 50 emails for faster loading
-        ).execute()
-        
-        messages = results.get('messages', [])
-        emails = []
-        
-        for message in messages:
-            msg = service.users().messages().get(
-                userId='me',
-                id=message['id'],
-                format='metadata',
-                metadataHeaders=['Subject', 'From', 'Date']
-            ).execute()
-            
-            headers = msg['payload']['headers']
-            subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-            from_email = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
-            date = next((h['value'] for h in headers if h['name'] == 'Date'), '')
-            
-            # Get snippet
-            snippet = msg.get('snippet', '')
-            
-            # Categorize email
-            category = categorize_email(subject, snippet)
-            
-            # Extract company name
-            company = extract_company_name(from_email, subject)
-            
-            # Create Gmail URL
-            gmail_url = f"https://mail.google.com/mail/u/0/#inbox/{message['id']}"
-            
-            emails.append({
-                'id': message['id'],
-                'subject': subject,
-                'snippet': snippet,
-                'from_email': from_email,
-                'date': date,
-                'category': category,
-                'company': company,
-                'gmail_url': gmail_url
-            })
-        
-        return emails
-    
-    except HttpError as error:
-        raise HTTPException(status_code=500, detail=f"Gmail API error: {str(error)}")
+        message_ids = await list_message_ids_async(access_token, query, max_results)
+    except httpx.HTTPStatusError as error:
+        if error.response.status_code != 401:
+            raise HTTPException(status_code=500, detail=f"Gmail API error: {str(error)}")
+        # Access token expired; refresh once and retry
+        access_token = await asyncio.to_thread(refresh_access_token, token_data, user_id)
+        message_ids = await list_message_ids_async(access_token, query, max_results)
+
+    # supabase-py is blocking; keep the cache round-trips off the event loop
+    emails_by_id = await asyncio.to_thread(get_cached_emails, user_id, message_ids)
+    missing_ids = [mid for mid in message_ids if mid not in emails_by_id]
+
+    fetched = await fetch_messages_metadata_async(access_token, missing_ids)
+    new_emails = [parse_message_metadata(msg) for msg in fetched.values()]
+    await asyncio.to_thread(save_cached_emails, user_id, new_emails)
+    emails_by_id.update({email['id']: email for email in new_emails})
+
+    return [emails_by_id[mid] for mid in message_ids if mid in emails_by_id]
+
+def fetch_messages_metadata(service, message_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch message metadata for a list of IDs using batched HTTP requests.
+
+    Instead of one round-trip per message, all gets ride a single batch
+    request (chunked at Gmail's 100-call limit). Returns a dict keyed by
+    message ID so callers can preserve their own ordering.
+    """
+    fetched = {}
+
+    def collect(request_id, response, exception):
+        if exception is not None:
+            logger.warning(f"Error fetching message {request_id}: {exception}")
+            return
+        fetched[request_id] = response
+
+    for start in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=collect)
+        for mid in message_ids[start:start + GMAIL_BATCH_SIZE]:
+            batch.add(
+                service.users().messages().get(
+                    userId='me',
+                    id=mid,
+                    format='metadata',
+                    metadataHeaders=['Subject', 'From', 'Date'],
+                    # Only transfer the parts of the envelope we actually read
+                    fields='id,snippet,payload/headers'
+                ),
+                request_id=mid
+            )
+        batch.execute()
+
+    return fetched
+
+def get_cached_emails(user_id: str, message_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Load previously parsed email summaries from the Supabase cache."""
+    if not user_id or not message_ids:
+        return {}
+    try:
+        result = supabase.table('email_cache').select('message_id, payload') \
+            .eq('user_id', user_id).in_('message_id', message_ids).execute()
+        return {row['message_id']: orjson.loads(row['payload']) for row in result.data}
+    except Exception as e:
+        logger.error(f"Error reading email cache from Supabase: {e}")
+        return {}
+
+def save_cached_emails(user_id: str, emails: List[Dict[str, Any]]):
+    """Store parsed email summaries in the Supabase cache."""
+    if not user_id or not emails:
+        return
+    try:
+        supabase.table('email_cache').upsert([
+            {
+                'user_id': user_id,
+                'message_id': email['id'],
+                'payload': orjson.dumps(email).decode(),
+                'fetched_at': datetime.utcnow().isoformat()
+            }
+            for email in emails
+        ]).execute()
+    except Exception as e:
+        logger.error(f"Error saving email cache to Supabase: {e}")
+
+def find_text_body_raw(payload: Dict[str, Any]) -> bytes:
+    """Return the first text/plain body in a message payload tree, undecoded.
+
+    Walks nested multipart structures with an explicit stack and stops at
+    the first text/plain part, so only one part is ever base64-decoded.
+    """
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        if part.get('mimeType') == 'text/plain' and part.get('body', {}).get('data'):
+            return base64.urlsafe_b64decode(part['body']['data'])
+        stack.extend(part.get('parts', []))
+    return b""
+
+def parse_message_metadata(msg: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an email summary dict from a Gmail metadata response."""
+    # Build the header lookup once instead of scanning the list per field;
+    # names are lowercased since header casing isn't guaranteed
+    headers = {h['name'].lower(): h['value'] for h in msg['payload']['headers']}
+    subject = headers.get('subject', 'No Subject')
+    from_email = headers.get('from', 'Unknown')
+    date = headers.get('date', '')
+
+    # Get snippet
+    snippet = msg.get('snippet', '')
+
+    company = extract_company_name(from_email, subject)
+
+    return {
+        'id': msg['id'],
+        'subject': subject,
+        'snippet': snippet,
+        'from_email': from_email,
+        'date': date,
+        'category': categorize_email(subject, snippet),
+        'company': company,
+        # Lowercased once at parse time so company filtering doesn't
+        # re-lowercase every row on every request
+        'company_lc': company.lower() if company else '',
+        'gmail_url': f"https://mail.google.com/mail/u/0/#inbox/{msg['id']}"
+    }
 
 # Helper functions for Supabase token storage
 
+# Tokens change rarely, so a short-lived in-process cache saves a Supabase
+# round-trip at the start of every authenticated request
+_token_cache = TTLCache(maxsize=10_000, ttl=300)
+_token_cache_lock = threading.Lock()
+
 def save_user_token_db(user_id, token_data):
     """Save user token data to Supabase."""
+    # Drop any cached copies so the next read sees the fresh token and the
+    # next request builds a service from the new credentials
+    with _token_cache_lock:
+        _token_cache.pop(user_id, None)
+    with _service_cache_lock:
+        _service_cache.pop(user_id, None)
     try:
-        # Store in Supabase
+        # token_data is a jsonb column and the timestamps have now()
+        # defaults, so the dict goes straight through without a
+        # dumps/loads round-trip in Python
         result = supabase.table('user_tokens').upsert({
             'user_id': user_id,
-            'token_data': json.dumps(token_data),
-            'created_at': datetime.utcnow().isoformat(),
+            'token_data': token_data,
             'updated_at': datetime.utcnow().isoformat()
         }).execute()
-        print(f"Token saved to Supabase for user {user_id}")
+        logger.debug(f"Token saved to Supabase for user {user_id}")
     except Exception as e:
-        print(f"Error saving token to Supabase: {e}")
+        logger.error(f"Error saving token to Supabase: {e}")
         # Fallback to in-memory storage
         user_tokens[user_id] = token_data
 
 def get_user_token_db(user_id):
     """Get user token data from Supabase."""
+    with _token_cache_lock:
+        token_data = _token_cache.get(user_id)
+    if token_data is not None:
+        return token_data
+
     try:
         # Try Supabase first
         result = supabase.table('user_tokens').select('*').eq('user_id', user_id).execute()
         if result.data:
             token_record = result.data[0]
-            return json.loads(token_record['token_data'])
+            token_data = token_record['token_data']
+            # Rows written before the jsonb migration hold a text blob
+            if isinstance(token_data, str):
+                token_data = orjson.loads(token_data)
+            with _token_cache_lock:
+                _token_cache[user_id] = token_data
+            return token_data
     except Exception as e:
-        print(f"Error getting token from Supabase: {e}")
-    
+        logger.error(f"Error getting token from Supabase: {e}")
+
     # Fallback to in-memory storage
     return user_tokens.get(user_id)
 
+# The email -> user_id mapping is stable once created, so it gets a much
+# longer TTL than the token cache
+_user_id_cache = TTLCache(maxsize=10_000, ttl=3600)
+_user_id_cache_lock = threading.Lock()
+
 def save_user_email_mapping(user_id, email):
     """Save user email mapping to Supabase."""
+    # Stored lowercased so equality lookups hit the plain unique index on
+    # email (see SETUP.md for the migration lowering pre-existing rows)
+    email = email.lower()
     try:
         result = supabase.table('user_emails').upsert({
             'user_id': user_id,
@@ -251,18 +587,28 @@ def save_user_email_mapping(user_id, email):
             'created_at': datetime.utcnow().isoformat(),
             'updated_at': datetime.utcnow().isoformat()
         }).execute()
-        print(f"Email mapping saved to Supabase: {email} -> {user_id}")
+        with _user_id_cache_lock:
+            _user_id_cache[email] = user_id
+        logger.debug(f"Email mapping saved to Supabase: {email} -> {user_id}")
     except Exception as e:
-        print(f"Error saving email mapping to Supabase: {e}")
+        logger.error(f"Error saving email mapping to Supabase: {e}")
 
 def get_user_id_by_email(email):
     """Get user ID by email from Supabase."""
+    email = email.lower()
+    with _user_id_cache_lock:
+        user_id = _user_id_cache.get(email)
+    if user_id is not None:
+        return user_id
     try:
         result = supabase.table('user_emails').select('user_id').eq('email', email).execute()
         if result.data:
-            return result.data[0]['user_id']
+            user_id = result.data[0]['user_id']
+            with _user_id_cache_lock:
+                _user_id_cache[email] = user_id
+            return user_id
     except Exception as e:
-        print(f"Error getting user ID by email from Supabase: {e}")
+        logger.error(f"Error getting user ID by email from Supabase: {e}")
     return None
 
 # Session management
@@ -275,10 +621,26 @@ def create_user_token(user_id: str, email: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+# Verified JWT payloads by token; the dashboard re-sends the same token
+# many times a minute, so skip repeating the HMAC + parse for each call
+_jwt_cache = TTLCache(maxsize=50_000, ttl=300)
+_jwt_cache_lock = threading.Lock()
+
 def verify_user_token(token: str) -> Optional[Dict[str, Any]]:
     """Verify and decode user JWT token."""
+    with _jwt_cache_lock:
+        payload = _jwt_cache.get(token)
+    if payload is not None:
+        # The cache TTL may outlive the token itself; re-check exp
+        if payload.get("exp", 0) > time.time():
+            return payload
+        with _jwt_cache_lock:
+            _jwt_cache.pop(token, None)
+        return None
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        with _jwt_cache_lock:
+            _jwt_cache[token] = payload
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -299,6 +661,53 @@ def get_current_user(request: Request) -> Optional[Dict[str, Any]]:
         return verify_user_token(token)
     return None
 
+# Read once at import; re-reading env vars per request invited config drift
+BACKEND_URL = os.getenv("BACKEND_URL", "https://job-tracker-backend-pij9.onrender.com")
+GMAIL_SCOPES = [os.getenv("GMAIL_SCOPES", "https://www.googleapis.com/auth/gmail.readonly")]
+
+@lru_cache(maxsize=1)
+def get_oauth_client_config() -> Dict[str, Any]:
+    """Build the Google OAuth client config once instead of per request."""
+    return {
+        "web": {
+            "client_id": os.getenv("GOOGLE_CLIENT_ID"),
+            "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
+            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "redirect_uris": [f"{BACKEND_URL}/auth/callback"]
+        }
+    }
+
+def make_oauth_flow() -> Flow:
+    """Create an OAuth Flow from the cached client config."""
+    flow = Flow.from_client_config(get_oauth_client_config(), scopes=GMAIL_SCOPES)
+    flow.redirect_uri = f"{BACKEND_URL}/auth/callback"
+    return flow
+
+@app.on_event("startup")
+async def prewarm():
+    """Pay the cold-start costs once at boot instead of on the first request."""
+    # Any request on the shared client performs DNS + TCP + TLS against
+    # gmail.googleapis.com; the 401 reply is expected and the warmed
+    # connection stays pooled for real requests
+    try:
+        await get_gmail_http().get("/users/me/profile", timeout=5.0)
+    except Exception as e:
+        logger.warning(f"Gmail prewarm failed: {e}")
+    try:
+        await asyncio.to_thread(
+            lambda: supabase.table('user_tokens').select('user_id').limit(1).execute()
+        )
+    except Exception as e:
+        logger.warning(f"Supabase prewarm failed: {e}")
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    global _gmail_http
+    if _gmail_http is not None:
+        await _gmail_http.aclose()
+        _gmail_http = None
+
 @app.get("/")
 async def health_check():
     """Health check endpoint."""
@@ -308,23 +717,7 @@ async def health_check():
 async def login():
     """Initiate Google OAuth login."""
     try:
-        # Use environment variable for backend URL
-        backend_url = os.getenv("BACKEND_URL", "https://job-tracker-backend-pij9.onrender.com")
-        
-        flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": os.getenv("GOOGLE_CLIENT_ID"),
-                    "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": [f"{backend_url}/auth/callback"]
-                }
-            },
-            scopes=[os.getenv("GMAIL_SCOPES", "https://www.googleapis.com/auth/gmail.readonly")]
-        )
-        
-        flow.redirect_uri = f"{backend_url}/auth/callback"
+        flow = make_oauth_flow()
         authorization_url, state = flow.authorization_url(
             access_type='offline',
             include_granted_scopes='true',
@@ -340,21 +733,7 @@ async def login():
 async def auth_callback(code: str, state: Optional[str] = None):
     """Handle OAuth callback and exchange code for tokens."""
     try:
-        # Use environment variable for backend URL
-        backend_url = os.getenv("BACKEND_URL", "https://job-tracker-backend-pij9.onrender.com")
-        flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": os.getenv("GOOGLE_CLIENT_ID"),
-                    "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": [f"{backend_url}/auth/callback"]
-                }
-            },
-            scopes=[os.getenv("GMAIL_SCOPES", "https://www.googleapis.com/auth/gmail.readonly")]
-        )
-        flow.redirect_uri = f"{backend_url}/auth/callback"
+        flow = make_oauth_flow()
         flow.fetch_token(code=code)
         credentials = flow.credentials
         
@@ -367,10 +746,10 @@ async def auth_callback(code: str, state: Optional[str] = None):
         existing_user_id = get_user_id_by_email(user_email)
         if existing_user_id:
             user_id = existing_user_id
-            print(f"Existing user {user_email} logged in")
+            logger.info(f"Existing user {user_email} logged in")
         else:
             user_id = secrets.token_urlsafe(32)
-            print(f"New user {user_email} created")
+            logger.info(f"New user {user_email} created")
         
         # Store credentials
         token_data = {
@@ -389,7 +768,7 @@ async def auth_callback(code: str, state: Optional[str] = None):
         # Create session token
         session_token = create_user_token(user_id, user_email)
         
-        print(f"Stored credentials for user {user_id} ({user_email})")
+        logger.debug(f"Stored credentials for user {user_id} ({user_email})")
         frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
         
         # Redirect with session token
@@ -405,7 +784,7 @@ async def auth_callback(code: str, state: Optional[str] = None):
         return response
         
     except Exception as e:
-        print(f"Auth callback error: {str(e)}")
+        logger.error(f"Auth callback error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Authentication failed: {str(e)}")
 
 @app.get("/emails")
@@ -413,55 +792,303 @@ async def get_emails(
     user_id: str,
     max_results: int = 100,
     category: Optional[str] = None,
-    company: Optional[str] = None
+    company: Optional[str] = None,
+    since: Optional[str] = None
 ):
-    """Get categorized emails for the user."""
-    token_data = get_user_token_db(user_id)
+    """Get categorized emails for the user.
+
+    `since` takes a Gmail-style date (e.g. 2024/01/31) and is pushed into
+    the search query, so polling clients only ask for newer messages.
+    """
+    token_data = await asyncio.to_thread(get_user_token_db, user_id)
     if not token_data:
         raise HTTPException(status_code=401, detail="User not authenticated")
     try:
-        service = get_gmail_service(token_data)
-        emails = get_user_emails(service, max_results)
-        print(f"Found {len(emails)} emails for user {user_id}")
-        if category:
-            emails = [email for email in emails if email['category'] == category]
-        if company:
-            emails = [email for email in emails if email['company'] and company.lower() in email['company'].lower()]
-        email_summaries = [EmailSummary(**email) for email in emails]
+        emails = await get_user_emails_async(
+            token_data, min(max_results, 50),  # Limit to 50 emails for faster loading
+            user_id=user_id, category=category, company=company, since=since
+        )
+        logger.debug(f"Found {len(emails)} emails for user {user_id}")
+        # Apply both filters in a single pass instead of two full sweeps
+        if category or company:
+            company_query = company.lower() if company else None
+            emails = [
+                email for email in emails
+                if (not category or email['category'] == category)
+                and (not company_query or company_query in (
+                    # Older cache rows predate company_lc; fall back to lowering
+                    email.get('company_lc') or (email['company'] or '').lower()
+                ))
+            ]
+        # The dicts were produced by our own parser, so skip pydantic's
+        # per-field validation on the way out
+        email_summaries = [EmailSummary.model_construct(**email) for email in emails]
         return {"emails": email_summaries}
     except Exception as e:
-        print(f"Error fetching emails: {str(e)}")
+        logger.error(f"Error fetching emails: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch emails: {str(e)}")
 
+# How long a computed dashboard snapshot may be served before rescanning Gmail
+DASHBOARD_STATS_TTL_SECONDS = 120
+
+def get_cached_dashboard_stats(user_id: str) -> Optional[Dict[str, Any]]:
+    """Return a recent dashboard snapshot from Supabase, or None if stale."""
+    try:
+        result = supabase.table('dashboard_stats_cache').select('stats, updated_at') \
+            .eq('user_id', user_id).execute()
+        if result.data:
+            row = result.data[0]
+            # updated_at is timestamptz, so PostgREST returns it with an
+            # offset; compare against an aware "now" (rows written before
+            # the column carried an offset are treated as UTC)
+            updated_at = datetime.fromisoformat(row['updated_at'])
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) - updated_at < timedelta(seconds=DASHBOARD_STATS_TTL_SECONDS):
+                return orjson.loads(row['stats'])
+    except Exception as e:
+        logger.error(f"Error reading dashboard stats cache from Supabase: {e}")
+    return None
+
+def save_cached_dashboard_stats(user_id: str, stats: Dict[str, Any]):
+    """Store a freshly computed dashboard snapshot in Supabase."""
+    try:
+        supabase.table('dashboard_stats_cache').upsert({
+            'user_id': user_id,
+            'stats': orjson.dumps(stats).decode(),
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }).execute()
+    except Exception as e:
+        logger.error(f"Error saving dashboard stats cache to Supabase: {e}")
+
+def get_sync_state(user_id: str) -> Optional[Dict[str, Any]]:
+    """Get the user's Gmail sync state (last history id) from Supabase."""
+    try:
+        result = supabase.table('user_sync_state').select('*').eq('user_id', user_id).execute()
+        if result.data:
+            return result.data[0]
+    except Exception as e:
+        logger.error(f"Error getting sync state from Supabase: {e}")
+    return None
+
+def save_sync_state(user_id: str, history_id):
+    """Save the user's Gmail sync state to Supabase."""
+    try:
+        supabase.table('user_sync_state').upsert({
+            'user_id': user_id,
+            'last_history_id': str(history_id),
+            'last_synced_at': datetime.utcnow().isoformat()
+        }).execute()
+    except Exception as e:
+        logger.error(f"Error saving sync state to Supabase: {e}")
+
+async def sync_user_emails_async(token_data: Dict[str, Any], user_id: str):
+    """Bring email_cache up to date, fetching only messages added since last sync.
+
+    Gmail's history API returns just the changes after a stored historyId,
+    so steady-state syncs cost O(new messages) instead of re-listing the
+    mailbox. Falls back to a full seed fetch on the first sync or when the
+    stored historyId is too old for Gmail to diff against (404).
+    """
+    access_token = token_data.get('token')
+    state = await asyncio.to_thread(get_sync_state, user_id)
+    last_history_id = state.get('last_history_id') if state else None
+
+    if last_history_id:
+        params = {
+            'startHistoryId': last_history_id,
+            'historyTypes': 'messageAdded',
+            'fields': 'history/messagesAdded/message/id,historyId,nextPageToken'
+        }
+        response = await get_gmail_http().get(
+            "/users/me/history",
+            params=params,
+            headers={'Authorization': f"Bearer {access_token}"}
+        )
+        if response.status_code == 401:
+            access_token = await asyncio.to_thread(refresh_access_token, token_data, user_id)
+            response = await get_gmail_http().get(
+                "/users/me/history",
+                params=params,
+                headers={'Authorization': f"Bearer {access_token}"}
+            )
+        if response.status_code == 404:
+            # historyId expired; redo the full seed below
+            last_history_id = None
+        else:
+            response.raise_for_status()
+            data = response.json()
+            new_ids = [
+                added['message']['id']
+                for record in data.get('history', [])
+                for added in record.get('messagesAdded', [])
+            ]
+            new_history_id = data.get('historyId')
+            # History arrives ~100 records per page; drain every page
+            # before persisting the new historyId, or a multi-page gap
+            # would permanently skip the later pages
+            page_token = data.get('nextPageToken')
+            while page_token:
+                response = await get_gmail_http().get(
+                    "/users/me/history",
+                    params={**params, 'pageToken': page_token},
+                    headers={'Authorization': f"Bearer {access_token}"}
+                )
+                response.raise_for_status()
+                data = response.json()
+                new_ids.extend(
+                    added['message']['id']
+                    for record in data.get('history', [])
+                    for added in record.get('messagesAdded', [])
+                )
+                new_history_id = data.get('historyId') or new_history_id
+                page_token = data.get('nextPageToken')
+            if new_ids:
+                cached = await asyncio.to_thread(get_cached_emails, user_id, new_ids)
+                missing_ids = [mid for mid in new_ids if mid not in cached]
+                fetched = await fetch_messages_metadata_async(access_token, missing_ids)
+                # History covers the whole mailbox, so keep only messages
+                # JOB_EMAIL_QUERY would have matched — the same predicate
+                # the seed fetch pushes down to Gmail, so a message is
+                # cached (or not) regardless of when it arrived
+                new_emails = [
+                    email for email in map(parse_message_metadata, fetched.values())
+                    if is_job_related(email['subject'], email['from_email'])
+                ]
+                await asyncio.to_thread(save_cached_emails, user_id, new_emails)
+            if new_history_id:
+                await asyncio.to_thread(save_sync_state, user_id, new_history_id)
+            return
+
+    # First sync (or expired history): seed the cache with a full fetch,
+    # then record the mailbox's current historyId for future deltas
+    await get_user_emails_async(token_data, max_results=1000, user_id=user_id)
+    profile = await get_gmail_http().get(
+        "/users/me/profile",
+        params={'fields': 'historyId'},
+        headers={'Authorization': f"Bearer {token_data.get('token')}"}
+    )
+    if profile.status_code == 200 and profile.json().get('historyId'):
+        await asyncio.to_thread(save_sync_state, user_id, profile.json()['historyId'])
+
+def count_categories_db(user_id: str) -> Optional[Counter]:
+    """Count categories with a single SQL aggregate over email_cache.
+
+    Runs the dashboard_stats Postgres function (GROUP BY over the cached
+    payloads, see SETUP.md), so no rows travel to Python and no Gmail
+    call is made. Returns None when nothing is cached for the user yet.
+    """
+    try:
+        result = supabase.rpc('dashboard_stats', {'uid': user_id}).execute()
+        if result.data:
+            return Counter({row['category']: row['count'] for row in result.data})
+    except Exception as e:
+        logger.error(f"Error aggregating dashboard stats in Supabase: {e}")
+    return None
+
+async def count_categories_async(token_data: Dict[str, Any], max_results: int = 1000,
+                                 user_id: Optional[str] = None) -> Counter:
+    """Tally email categories from concurrently fetched metadata.
+
+    Messages are fetched chunk by chunk with asyncio.gather; each chunk is
+    categorized, counted and discarded, so peak memory stays at one chunk
+    of metadata plus a handful of integers regardless of scan size.
+    """
+    access_token = token_data.get('token')
+    try:
+        message_ids = await list_message_ids_async(access_token, JOB_EMAIL_QUERY, max_results)
+    except httpx.HTTPStatusError as error:
+        if error.response.status_code != 401:
+            raise HTTPException(status_code=500, detail=f"Gmail API error: {str(error)}")
+        access_token = await asyncio.to_thread(refresh_access_token, token_data, user_id)
+        message_ids = await list_message_ids_async(access_token, JOB_EMAIL_QUERY, max_results)
+
+    counter = Counter()
+    for start in range(0, len(message_ids), GMAIL_BATCH_SIZE):
+        fetched = await fetch_messages_metadata_async(
+            access_token, message_ids[start:start + GMAIL_BATCH_SIZE]
+        )
+        for response in fetched.values():
+            headers = {h['name'].lower(): h['value'] for h in response['payload']['headers']}
+            counter[categorize_email(headers.get('subject', ''), response.get('snippet', ''))] += 1
+
+    return counter
+
+def stream_user_emails(service, max_results: int = 50, user_id: Optional[str] = None):
+    """Yield email summaries as NDJSON lines while Gmail batches resolve.
+
+    Cached summaries go out immediately; the rest are emitted per batch
+    chunk, so the client starts rendering before the full fetch finishes.
+    """
+    results = service.users().messages().list(
+        userId='me',
+        q=JOB_EMAIL_QUERY,
+        maxResults=min(max_results, 50),
+        fields='messages/id,nextPageToken'
+    ).execute()
+
+    message_ids = [m['id'] for m in results.get('messages', [])]
+    cached = get_cached_emails(user_id, message_ids)
+
+    pending_ids = []
+    for mid in message_ids:
+        if mid in cached:
+            # company_lc is an internal filter field; keep it out of the
+            # streamed rows like /emails does
+            yield orjson.dumps({k: v for k, v in cached[mid].items() if k != 'company_lc'}) + b"\n"
+        else:
+            pending_ids.append(mid)
+
+    for start in range(0, len(pending_ids), GMAIL_BATCH_SIZE):
+        chunk = pending_ids[start:start + GMAIL_BATCH_SIZE]
+        fetched = fetch_messages_metadata(service, chunk)
+        new_emails = [parse_message_metadata(fetched[mid]) for mid in chunk if mid in fetched]
+        save_cached_emails(user_id, new_emails)
+        for email in new_emails:
+            yield orjson.dumps({k: v for k, v in email.items() if k != 'company_lc'}) + b"\n"
+
+@app.get("/emails/stream")
+async def stream_emails(user_id: str, max_results: int = 100):
+    """Stream categorized emails as NDJSON so the client can render incrementally."""
+    # Token lookup and service build both block (Supabase round-trip, and
+    # possibly a credentials.refresh() call); keep them off the event loop
+    token_data = await asyncio.to_thread(get_user_token_db, user_id)
+    if not token_data:
+        raise HTTPException(status_code=401, detail="User not authenticated")
+    service = await asyncio.to_thread(get_gmail_service, token_data, user_id)
+    return StreamingResponse(
+        stream_user_emails(service, max_results, user_id=user_id),
+        media_type="application/x-ndjson"
+    )
+
 @app.get("/emails/{email_id}")
 async def get_email_detail(email_id: str, user_id: str):
     """Get detailed email content."""
-    token_data = get_user_token_db(user_id)
+    token_data = await asyncio.to_thread(get_user_token_db, user_id)
     if not token_data:
         raise HTTPException(status_code=401, detail="User not authenticated")
     try:
-        service = get_gmail_service(token_data)
-        message = service.users().messages().get(
-            userId='me',
-            id=email_id,
-            format='full'
-        ).execute()
-        headers = message['payload']['headers']
-        subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-        from_email = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown')
-        date = next((h['value'] for h in headers if h['name'] == 'Date'), '')
-        body = ""
-        if 'parts' in message['payload']:
-            for part in message['payload']['parts']:
-                if part['mimeType'] == 'text/plain':
-                    body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                    break
-        elif 'body' in message['payload'] and 'data' in message['payload']['body']:
-            body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
-        category = categorize_email(subject, body)
+        access_token = token_data.get('token')
+        try:
+            message = await fetch_message_full_async(access_token, email_id)
+        except httpx.HTTPStatusError as error:
+            if error.response.status_code != 401:
+                raise
+            access_token = await asyncio.to_thread(refresh_access_token, token_data, user_id)
+            message = await fetch_message_full_async(access_token, email_id)
+        headers = {h['name'].lower(): h['value'] for h in message['payload']['headers']}
+        subject = headers.get('subject', 'No Subject')
+        from_email = headers.get('from', 'Unknown')
+        date = headers.get('date', '')
+        raw_body = find_text_body_raw(message['payload'])
+        body = raw_body.decode('utf-8', errors='replace')
+        # The deciding keywords sit in the opening lines; scan the subject
+        # plus a bounded slice of the still-undecoded body with bytes.find
+        category = categorize_email_bytes(subject.encode() + b' ' + raw_body[:2048])
         company = extract_company_name(from_email, subject)
         gmail_url = f"https://mail.google.com/mail/u/0/#inbox/{email_id}"
-        email_detail = EmailDetail(
+        # Same trusted-data shortcut as the /emails list path
+        email_detail = EmailDetail.model_construct(
             id=email_id,
             subject=subject,
             body=body,
@@ -478,25 +1105,36 @@ async def get_email_detail(email_id: str, user_id: str):
 @app.get("/dashboard/stats")
 async def get_dashboard_stats(user_id: str):
     """Get dashboard statistics."""
-    token_data = get_user_token_db(user_id)
+    # Supabase access is blocking; keep it off the event loop
+    token_data = await asyncio.to_thread(get_user_token_db, user_id)
     if not token_data:
         raise HTTPException(status_code=401, detail="User not authenticated")
     try:
-        service = get_gmail_service(token_data)
-        emails = get_user_emails(service, max_results=1000)
-        categories = {}
-        for email in emails:
-            category = email['category']
-            categories[category] = categories.get(category, 0) + 1
-        stats = DashboardStats(
-            total_applications=len(emails),
-            applications_sent=categories.get('applications_sent', 0),
-            rejected=categories.get('rejected', 0),
-            interview_scheduled=categories.get('interview_scheduled', 0),
-            offer_received=categories.get('offer_received', 0),
-            categories=categories
-        )
-        return stats
+        # A browser refresh or second dashboard tab shouldn't trigger a
+        # full Gmail rescan; serve a snapshot younger than the TTL
+        stats = await asyncio.to_thread(get_cached_dashboard_stats, user_id)
+        if stats is None:
+            # Pull only the messages added since the last sync so the
+            # cached emails (and the SQL aggregate below) stay current
+            try:
+                await sync_user_emails_async(token_data, user_id)
+            except Exception as e:
+                logger.error(f"Error syncing emails for user {user_id}: {e}")
+            # Prefer the SQL aggregate over the cached emails; fall back to
+            # scanning Gmail when nothing is cached for this user yet
+            categories = await asyncio.to_thread(count_categories_db, user_id)
+            if categories is None:
+                categories = await count_categories_async(token_data, max_results=1000, user_id=user_id)
+            stats = {
+                'total_applications': sum(categories.values()),
+                'applications_sent': categories.get('applications_sent', 0),
+                'rejected': categories.get('rejected', 0),
+                'interview_scheduled': categories.get('interview_scheduled', 0),
+                'offer_received': categories.get('offer_received', 0),
+                'categories': dict(categories)
+            }
+            await asyncio.to_thread(save_cached_dashboard_stats, user_id, stats)
+        return ORJSONResponse(stats, headers={"Cache-Control": "private, max-age=60"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard stats: {str(e)}")
 